@@ -1,31 +1,53 @@
 #!/usr/bin/env python3
 import os
 
-print("=== DEBUG PORT ISSUE ===")
-print("Environment variables with 'LLAMA':")
-for k, v in os.environ.items():
-    if 'LLAMA' in k:
-        print(f"  {k} = {repr(v)}")
+LLAMA_STACK_ENV_VARS = ("LLAMA_STACK_HOST", "LLAMA_STACK_PORT", "LLAMA_STACK_SECURE", "LLAMA_STACK_API_KEY")
+# Only reported as set/unset with a length, never printed
+SECRET_ENV_VARS = frozenset({"LLAMA_STACK_API_KEY"})
 
-print("\nSpecific LLAMA_STACK_PORT check:")
-port = os.environ.get("LLAMA_STACK_PORT")
-print(f"  Raw value: {repr(port)}")
-print(f"  Type: {type(port)}")
-if port:
-    print(f"  Length: {len(port)}")
-    print(f"  Bytes: {port.encode('utf-8')}")
+
+def print_env() -> None:
+    """Print the LlamaStack environment variables and check LLAMA_STACK_PORT"""
+    lines = ["=== DEBUG PORT ISSUE ===", "LlamaStack environment variables:"]
+    for k in LLAMA_STACK_ENV_VARS:
+        v = os.environ.get(k)
+        if v is None:
+            continue
+        if k in SECRET_ENV_VARS:
+            lines.append(f"  {k} = <set, {len(v)} chars>")
+        else:
+            lines.append(f"  {k} = {repr(v)}")
+
+    lines.append("\nSpecific LLAMA_STACK_PORT check:")
+    port = os.environ.get("LLAMA_STACK_PORT")
+    lines.append(f"  Raw value: {repr(port)}")
+    lines.append(f"  Type: {type(port)}")
+    if port:
+        lines.append(f"  Length: {len(port)}")
+        lines.append(f"  Bytes: {port.encode('utf-8')}")
+        try:
+            # Importing run pulls in llama_stack_client, which may be the thing that is broken
+            from run import parse_port
+        except Exception as e:
+            lines.append(f"  WARNING could not import run.parse_port, falling back to int(): {e}")
+            parse_port = int
+        try:
+            port_int = parse_port(port)
+            lines.append(f"  As int: {port_int}")
+        except ValueError as e:
+            lines.append(f"  ERROR parsing port: {e}")
+    print("\n".join(lines))
+
+
+if __name__ == "__main__":
+    print_env()
+
+    print("\n=== Attempting to reproduce the error ===")
     try:
-        port_int = int(port)
-        print(f"  As int: {port_int}")
+        from run import main
+        print("About to call main()...")
+        main()
     except Exception as e:
-        print(f"  ERROR converting to int: {e}")
-
-print("\n=== Attempting to reproduce the error ===")
-try:
-    from run import main
-    print("About to call main()...")
-    main()
-except Exception as e:
-    print(f"Error in main(): {e}")
-    import traceback
-    traceback.print_exc()
+        print(f"Error in main(): {e}")
+        import traceback
+        traceback.print_exc()
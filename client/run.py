@@ -1,16 +1,33 @@
 import argparse
+import asyncio
+import hashlib
+import json
+import mmap
 import os
+import sys
+import threading
+
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import lru_cache
 
 from pathlib import Path
 import time
-from typing import Any, List, Optional, Tuple, Union
+from types import MappingProxyType
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
-from llama_stack_client import LlamaStackClient
+import httpx
+from llama_stack_client import DefaultHttpxClient, LlamaStackClient
 from llama_stack_client.types.model import Model
 from llama_stack_client.types.shared_params.document import Document as RAGDocument
 from llama_stack_client.lib.agents.agent import Agent
 from llama_stack_client.lib.agents.event_logger import EventLogger as AgentEventLogger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # EMBEDDING_MODEL = "granite-embedding-125m"
 # EMBEDDING_DIMENSION = "768"
 # EMBEDDING_MODEL_PROVIDER = "sentence-transformers"
@@ -19,24 +36,230 @@ from llama_stack_client.lib.agents.event_logger import EventLogger as AgentEvent
 # LLAMA_STACK_PORT = "8080"
 # LLAMA_STACK_SECURE = "False"
 # DOCS_FOLDER = "./docs"
+# INGESTED_STATE_FILE = "./.ingested.json"  (optional, unset disables skipping unchanged documents)
 
 DEFAULT_DELAY_SECONDS = 5
+MMAP_THRESHOLD_BYTES = 256 * 1024
+DEFAULT_INSERT_BATCH_SIZE = 64
+DEFAULT_INSERT_MAX_BATCH_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_CONCURRENT_INSERTS = 4
+MODELS_CACHE_TTL_SECONDS = 60 * 60
+
+MIME_TYPES: Mapping[str, str] = MappingProxyType({
+    '.txt': 'text/plain',
+    '.md': 'text/markdown', 
+    '.py': 'text/plain',
+    '.json': 'application/json',
+    '.html': 'text/html',
+    '.csv': 'text/csv'
+})
+
+_LOG_LOCK = threading.Lock()
+
+
+def log(message: str) -> None:
+    """Print a message as one line; safe to call from the reader, setup and insert threads"""
+    with _LOG_LOCK:
+        sys.stdout.write(f"{message}\n")
+        sys.stdout.flush()
+
+
+class OrjsonHttpxClient(DefaultHttpxClient):
+    """httpx client that encodes JSON request bodies with orjson when it is installed"""
+
+    def build_request(self, method: str, url: Any, *, json: Any = None, headers: Any = None, **kwargs: Any) -> httpx.Request:
+        # Multipart requests pass files/data alongside json and must be left for httpx to encode
+        if json is not None and orjson is not None and kwargs.get("files") is None and kwargs.get("data") is None:
+            try:
+                content: bytes = orjson.dumps(json)
+            except TypeError:
+                # Fall back to httpx's encoder for anything orjson cannot serialize
+                pass
+            else:
+                headers = httpx.Headers(headers)
+                headers["Content-Type"] = "application/json"
+                return super().build_request(method, url, content=content, headers=headers, **kwargs)
+        return super().build_request(method, url, json=json, headers=headers, **kwargs)
+
+
+def parse_port(value: str) -> int:
+    """Parse a port number, raising if it is not an integer in the valid range"""
+    try:
+        port: int = int(value)
+    except ValueError:
+        raise ValueError(f"Port must be an integer, got {value!r}") from None
+    if not (1 <= port <= 65535):
+        raise ValueError(f"Port number {port} is out of valid range (1-65535).")
+    return port
+
+
+@dataclass(frozen=True, slots=True)
+class RunConfig:
+    """Settings for a loader run, read from the environment"""
+    embedding_model_id: str
+    embedding_dimension: int
+    embedding_model_provider: str
+    chunk_size_in_tokens: int
+    host: str
+    port: int
+    secure: bool
+    docs_folder: str
+    ingested_state_file: str
+
+    @classmethod
+    def from_env(cls) -> "RunConfig":
+        """Read and validate all settings from the environment in one pass"""
+        env = os.environ
+
+        # Get embedding model id, dimension and provider
+        embedding_model_id = env.get("EMBEDDING_MODEL")
+        if embedding_model_id is None:
+            raise ValueError("EMBEDDING_MODEL environment variable must be set")
+        embedding_dimension = env.get("EMBEDDING_DIMENSION")
+        if embedding_dimension is None:
+            raise ValueError("EMBEDDING_DIMENSION environment variable must be set")
+        try:
+            embedding_dimension = int(embedding_dimension)
+        except ValueError:
+            raise ValueError(f"EMBEDDING_DIMENSION environment variable must be an integer, got '{embedding_dimension}'") from None
+        embedding_model_provider = env.get("EMBEDDING_MODEL_PROVIDER")
+        if embedding_model_provider is None:
+            raise ValueError("EMBEDDING_MODEL_PROVIDER environment variable must be set")
+
+        # Get chunk size in tokens
+        chunk_size_in_tokens = env.get("CHUNK_SIZE_IN_TOKENS", "512")
+        try:
+            chunk_size_in_tokens = int(chunk_size_in_tokens)
+        except ValueError:
+            raise ValueError(f"CHUNK_SIZE_IN_TOKENS environment variable must be an integer, got '{chunk_size_in_tokens}'") from None
+
+        # Get LlamaStack host, port and secure
+        host = env.get("LLAMA_STACK_HOST")
+        if not host:
+            raise ValueError("LLAMA_STACK_HOST environment variable must be set")
+        port = env.get("LLAMA_STACK_PORT")
+        if not port:
+            raise ValueError("LLAMA_STACK_PORT environment variable must be set")
+        try:
+            port = parse_port(port)
+        except ValueError as e:
+            raise ValueError(f"LLAMA_STACK_PORT environment variable is invalid: {e}") from None
+        secure = env.get("LLAMA_STACK_SECURE", "false").lower() in ["true", "1", "yes"]
+
+        # Get documents folder
+        docs_folder = env.get("DOCS_FOLDER", "./docs")
+        if not docs_folder:
+            raise ValueError("DOCS_FOLDER environment variable must be set")
+
+        # Get the file recording already ingested documents (opt-in, since it is not checked against the
+        # server: if the vector DB is recreated, documents recorded there would not be inserted again)
+        ingested_state_file = env.get("INGESTED_STATE_FILE", "")
 
+        return cls(
+            embedding_model_id=embedding_model_id,
+            embedding_dimension=embedding_dimension,
+            embedding_model_provider=embedding_model_provider,
+            chunk_size_in_tokens=chunk_size_in_tokens,
+            host=host,
+            port=port,
+            secure=secure,
+            docs_folder=docs_folder,
+            ingested_state_file=ingested_state_file,
+        )
 
+
+@lru_cache(maxsize=None)
 def create_client(host: str, port: int, secure: bool = False) -> LlamaStackClient:
-    """Initialize and return the LlamaStack client"""
+    """Initialize and return the LlamaStack client (cached per host, port and secure)"""
     if secure:
         protocol: str = "https"
     else:
         protocol: str = "http"
 
-    if not (1 <= port <= 65535):
-        raise ValueError(f"Port number {port} is out of valid range (1-65535).")
     if not host:
         raise ValueError("Host must be specified and cannot be empty.")
     
-    print(f"Creating LlamaStack client with base URL: {protocol}://{host}:{port}")
-    return LlamaStackClient(base_url=f"{protocol}://{host}:{port}")
+    log(f"Creating LlamaStack client with base URL: {protocol}://{host}:{port}")
+    # Share one keep-alive connection pool across all REST calls to avoid a new handshake per request
+    # The default transport is kept so httpx still honours HTTP(S)_PROXY and NO_PROXY
+    http_client: httpx.Client = OrjsonHttpxClient(
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32, keepalive_expiry=60.0),
+    )
+    client: LlamaStackClient = LlamaStackClient(base_url=f"{protocol}://{host}:{port}", http_client=http_client)
+    
+    # Complete the TLS handshake up front so the first real call reuses a pooled connection
+    if secure:
+        try:
+            client.with_options(max_retries=0).inspect.health()
+        except Exception as e:
+            log(f"Warning: Could not pre-warm connection to {protocol}://{host}:{port}: {e}")
+    return client
+
+
+ModelKey = Tuple[str, str, str]
+
+# Model indexes by server base URL, see _get_model_index
+_MODEL_INDEXES: dict[str, dict[ModelKey, Model]] = {}
+
+
+def _models_cache_path() -> Path:
+    """Return the path of the on-disk model lookup cache"""
+    cache_home: str = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return Path(cache_home) / "eligibility-mcp" / "models.json"
+
+
+def _load_models_cache() -> dict[str, Any]:
+    """Load the on-disk model lookup cache, returning an empty cache if it cannot be read"""
+    try:
+        with open(_models_cache_path(), 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_models_cache(cache: dict[str, Any]) -> None:
+    """Write the on-disk model lookup cache, ignoring failures since it is only an optimization"""
+    cache_path: Path = _models_cache_path()
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+    except OSError as e:
+        log(f"Warning: Could not write model cache {cache_path}: {e}")
+
+
+def _get_model_index(client: LlamaStackClient, refresh: bool = False) -> Tuple[dict[ModelKey, Model], bool]:
+    """Return the server's models indexed by (identifier, provider ID, model type), and whether
+    the index was just fetched from the server
+
+    The index is kept in memory per server and persisted to the on-disk model cache,
+    so client.models.list() is only called when no recent index exists or refresh is set.
+    """
+    server_key: str = str(client.base_url)
+    if not refresh:
+        index: Optional[dict[ModelKey, Model]] = _MODEL_INDEXES.get(server_key)
+        if index is not None:
+            return index, False
+        
+        entry = _load_models_cache().get(server_key)
+        if isinstance(entry, dict) and time.time() - entry.get("cached_at", 0) < MODELS_CACHE_TTL_SECONDS:
+            try:
+                models: List[Model] = [Model.model_validate(data) for data in entry["models"]]
+                index = {(m.identifier, m.provider_id, m.api_model_type): m for m in models}
+                _MODEL_INDEXES[server_key] = index
+                return index, False
+            except Exception as e:
+                log(f"Warning: Ignoring invalid cached models for {server_key}: {e}")
+    
+    models = client.models.list()
+    index = {(m.identifier, m.provider_id, m.api_model_type): m for m in models}
+    _MODEL_INDEXES[server_key] = index
+    
+    cache: dict[str, Any] = _load_models_cache()
+    cache[server_key] = {"models": [m.to_dict() for m in models], "cached_at": time.time()}
+    _save_models_cache(cache)
+    return index, True
 
 
 def get_embedding_model(
@@ -50,26 +273,20 @@ def get_embedding_model(
     if not embedding_model_provider:
         raise ValueError("Embedding model provider is required")
     
-    models = client.models.list()
-    for model in models:
-        if model.identifier == embedding_model_id and model.provider_id == embedding_model_provider and model.api_model_type == "embedding":
-            return model
+    key: ModelKey = (embedding_model_id, embedding_model_provider, "embedding")
+    index, fetched = _get_model_index(client)
+    model: Optional[Model] = index.get(key)
+    if model is None and not fetched:
+        # The cached index may predate the model being registered, so check the server once more
+        model = _get_model_index(client, refresh=True)[0].get(key)
+    if model is not None:
+        return model
     
     raise ValueError(f"Embedding model {embedding_model_id} not found for provider {embedding_model_provider}")
 
 
-def register_vector_db(
-    client: LlamaStackClient, 
-    embedding_model: Model, 
-    vector_db_id: str = "milvus_db", 
-    provider_id: str = "milvus"
-) -> str:
-    """Register vector database"""
-    if not vector_db_id:
-        raise ValueError("Vector DB ID is required for registration")
-    if not provider_id:
-        raise ValueError("Provider ID is required for vector DB registration")
-    
+def _validate_embedding_model(embedding_model: Model) -> Tuple[str, Any]:
+    """Check that a model can back a vector DB and return its identifier and embedding dimension"""
     if not embedding_model:
         raise ValueError("Embedding model is required for vector DB registration")
     
@@ -82,98 +299,415 @@ def register_vector_db(
         raise ValueError("Provided model is not an embedding model")
 
     # Check if embedding model metadata contains 'embedding_dimension' and if it's a str, int or float
-    if not hasattr(embedding_model, 'metadata') or not isinstance(embedding_model.metadata, dict):
-        raise ValueError("Embedding model metadata must be a dictionary")
-    if not isinstance(embedding_model.metadata, dict):
+    metadata = getattr(embedding_model, 'metadata', None)
+    if not isinstance(metadata, dict):
         raise ValueError("Embedding model metadata must be a dictionary")
-    if not isinstance(embedding_model.metadata.get("embedding_dimension"), (str, int, float)):
+    embedding_dimension = metadata.get("embedding_dimension")
+    if not isinstance(embedding_dimension, (str, int, float)):
         raise ValueError("Embedding model metadata 'embedding_dimension' must be a str, int or float")
     
-    embedding_dimension: int = embedding_model.metadata["embedding_dimension"] # type: ignore
+    return embedding_model_id, embedding_dimension
+
+
+def register_vector_db(
+    client: LlamaStackClient, 
+    embedding_model: Model, 
+    vector_db_id: str = "milvus_db", 
+    provider_id: str = "milvus"
+) -> str:
+    """Register vector database"""
+    if not vector_db_id:
+        raise ValueError("Vector DB ID is required for registration")
+    if not provider_id:
+        raise ValueError("Provider ID is required for vector DB registration")
+    
+    embedding_model_id, embedding_dimension = _validate_embedding_model(embedding_model)
     
-    print(f"Registering vector DB: {vector_db_id} with embedding model {embedding_model_id} (dimension: {embedding_dimension})")
+    log(f"Registering vector DB: {vector_db_id} with embedding model {embedding_model_id} (dimension: {embedding_dimension})")
     client.vector_dbs.register(
         vector_db_id=vector_db_id,
         embedding_model=embedding_model_id,
         # embedding_dimension=embedding_dimension,
         provider_id=provider_id,
     )
-    print(f"Registered vector DB: {vector_db_id}")
+    log(f"Registered vector DB: {vector_db_id}")
     return vector_db_id
 
 
 def get_mime_type(extension: str) -> str:
     """Get MIME type based on file extension"""
-    mime_types: dict[str, str] = {
-        '.txt': 'text/plain',
-        '.md': 'text/markdown', 
-        '.py': 'text/plain',
-        '.json': 'application/json',
-        '.html': 'text/html',
-        '.csv': 'text/csv'
-    }
-    return mime_types.get(extension.lower(), 'text/plain')
+    return MIME_TYPES.get(extension.lower(), 'text/plain')
+
+
+def _read_one(entry: os.DirEntry) -> Tuple[os.DirEntry, str, os.stat_result]:
+    """Read a single file and return its directory entry, content and stat result"""
+    # DirEntry caches the stat result, so this is the only stat for the file
+    st: os.stat_result = entry.stat()
+    file_size: int = st.st_size
+    
+    # Large files are memory-mapped so the kernel pages them in on demand
+    if file_size > MMAP_THRESHOLD_BYTES:
+        fd: int = os.open(entry.path, os.O_RDONLY)
+        try:
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mmap, "MADV_SEQUENTIAL"):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                # Decode straight from the mapping rather than copying it into a bytes object first
+                content: str = str(mm, 'utf-8')
+        finally:
+            os.close(fd)
+    else:
+        # Binary read plus a single decode skips the TextIOWrapper's chunked decoding
+        with open(entry.path, 'rb') as f:
+            content: str = f.read().decode('utf-8')
+    return entry, content, st
+
+
+def _list_document_files(folder: Path, file_extensions: Iterable[str]) -> List[os.DirEntry]:
+    """Return the directory entries of files in a folder whose extension is one of file_extensions"""
+    extensions: frozenset[str] = frozenset(extension.lower() for extension in file_extensions)
+    # Symlinks are followed so mounted ConfigMap files (symlinks into ..data) are still picked up
+    with os.scandir(folder) as it:
+        return [
+            entry for entry in it
+            if entry.is_file() and os.path.splitext(entry.name)[1].lower() in extensions
+        ]
+
+
+def _build_document(entry: os.DirEntry, content: str, st: os.stat_result) -> RAGDocument:
+    """Build a RAGDocument from a file's content"""
+    stem, extension = os.path.splitext(entry.name)
+    mime_type: str = get_mime_type(extension)
+    
+    return RAGDocument(
+        document_id=stem,
+        content=content,
+        mime_type=mime_type,
+        metadata={
+            "filename": entry.name,
+            "filepath": entry.path,
+            "file_size": st.st_size,
+            "mtime_ns": st.st_mtime_ns
+        }
+    )
+
+
+def iter_documents(
+    folder_path: str, 
+    file_extensions: Iterable[str] = ('.txt', '.md')
+) -> Iterator[RAGDocument]:
+    """Load documents from a local folder and yield them as RAGDocument objects one at a time"""
+    folder: Path = Path(folder_path)
+    
+    if not folder.exists():
+        log(f"Warning: Folder {folder_path} does not exist")
+        return
+    
+    log(f"Loading documents from: {folder_path}")
+    
+    entries: List[os.DirEntry] = _list_document_files(folder, file_extensions)
+    loaded: int = 0
+    
+    # Reads are I/O bound and release the GIL, so fan them out over a thread pool,
+    # keeping only a bounded window of reads in flight so memory does not grow with the folder
+    max_workers: int = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures: dict[Future, os.DirEntry] = {}
+        remaining: Iterator[os.DirEntry] = iter(entries)
+        while True:
+            for entry in remaining:
+                futures[executor.submit(_read_one, entry)] = entry
+                if len(futures) >= max_workers * 2:
+                    break
+            if not futures:
+                break
+            
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                entry = futures.pop(future)
+                try:
+                    _, content, st = future.result()
+                except Exception as e:
+                    log(f"Error reading {entry.path}: {e}")
+                    continue
+                loaded += 1
+                log(f"Loaded: {entry.name}")
+                yield _build_document(entry, content, st)
+    
+    log(f"Successfully loaded {loaded} documents")
 
 
 def load_documents_from_folder(
     folder_path: str, 
-    file_extensions: List[str] = ['.txt', '.md']
+    file_extensions: Iterable[str] = ('.txt', '.md')
 ) -> List[RAGDocument]:
     """Load documents from a local folder and return RAGDocument objects"""
-    documents: List[RAGDocument] = []
-    folder: Path = Path(folder_path)
+    return list(iter_documents(folder_path, file_extensions))
+
+
+def _insert_batches(
+    client: LlamaStackClient, 
+    documents: Iterable[RAGDocument], 
+    vector_db_id: str, 
+    chunk_size_in_tokens: int,
+    batch_size: int,
+    max_batch_bytes: int,
+    offset: int = 0
+) -> int:
+    """Insert documents in batches, logging each batch's range starting at offset, and return how many were inserted"""
+    if batch_size < 1:
+        raise ValueError("Batch size must be a positive integer")
     
-    if not folder.exists():
-        print(f"Warning: Folder {folder_path} does not exist")
-        return documents
+    start: int = offset
+    batch: List[RAGDocument] = []
+    batch_bytes: int = 0
     
-    print(f"Loading documents from: {folder_path}")
+    def flush() -> None:
+        nonlocal start, batch, batch_bytes
+        end: int = start + len(batch)
+        try:
+            client.tool_runtime.rag_tool.insert(
+                documents=batch,
+                vector_db_id=vector_db_id,
+                chunk_size_in_tokens=chunk_size_in_tokens,
+            )
+        except Exception as e:
+            log(f"Error inserting documents [{start}:{end}] into vector DB: {e}")
+            raise
+        log(f"Inserted documents [{start}:{end}] into vector DB")
+        start = end
+        batch = []
+        batch_bytes = 0
     
-    for file_path in folder.iterdir():
-        if file_path.is_file() and file_path.suffix.lower() in file_extensions:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content: str = f.read()
-                
-                mime_type: str = get_mime_type(file_path.suffix)
-                
-                doc: RAGDocument = RAGDocument(
-                    document_id=file_path.stem,
-                    content=content,
-                    mime_type=mime_type,
-                    metadata={
-                        "filename": file_path.name,
-                        "filepath": str(file_path),
-                        "file_size": file_path.stat().st_size
-                    }
-                )
-                documents.append(doc)
-                print(f"Loaded: {file_path.name}")
-                
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
+    for doc in documents:
+        # Close the batch early once adding this document would push it past max_batch_bytes
+        doc_bytes: int = len(doc["content"])
+        if batch and batch_bytes + doc_bytes > max_batch_bytes:
+            flush()
+        batch.append(doc)
+        batch_bytes += doc_bytes
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
     
-    print(f"Successfully loaded {len(documents)} documents")
-    return documents
+    return start - offset
 
 
 def insert_documents(
     client: LlamaStackClient, 
-    documents: List[RAGDocument], 
+    documents: Iterable[RAGDocument], 
     vector_db_id: str, 
-    chunk_size_in_tokens: int = 512
+    chunk_size_in_tokens: int = 512,
+    batch_size: int = DEFAULT_INSERT_BATCH_SIZE,
+    max_batch_bytes: int = DEFAULT_INSERT_MAX_BATCH_BYTES
 ) -> None:
-    """Insert documents into the vector database"""
-    if not documents:
-        print("No documents to insert")
+    """Insert documents into the vector database in batches, consuming them as they are produced"""
+    inserted: int = _insert_batches(
+        client, documents, vector_db_id, chunk_size_in_tokens, batch_size, max_batch_bytes
+    )
+    if inserted == 0:
+        log("No documents to insert")
         return
+    log(f"Inserted {inserted} documents into vector DB")
+
+
+def _content_hash(content: str) -> str:
+    """Return the SHA-256 hex digest of a document's content"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _load_ingested_state(state_path: str) -> dict[str, dict[str, str]]:
+    """Load the record of already ingested document hashes, returning an empty record if it cannot be read"""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        return state if isinstance(state, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_ingested_state(state_path: str, state: dict[str, dict[str, str]]) -> None:
+    """Write the record of already ingested document hashes"""
+    try:
+        with open(state_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+    except OSError as e:
+        log(f"Warning: Could not write ingested state {state_path}: {e}")
+
+
+async def _produce_documents(
+    queue: "asyncio.Queue[Optional[RAGDocument]]",
+    folder_path: str,
+    file_extensions: Iterable[str],
+    ingested: Optional[dict[str, str]] = None,
+    pending: Optional[dict[str, str]] = None
+) -> None:
+    """Move documents from iter_documents onto the queue, then signal the batcher to stop
+
+    When ingested is given, documents whose content hash matches the recorded one are skipped
+    and the hashes of the queued documents are added to pending.
+    """
+    documents: Iterator[RAGDocument] = iter_documents(folder_path, file_extensions)
+    while True:
+        # The generator is advanced in a worker thread, one document at a time, so reading
+        # never runs further ahead than the bounded queue allows
+        doc: Optional[RAGDocument] = await asyncio.to_thread(next, documents, None)
+        if doc is None:
+            break
+        if ingested is not None and pending is not None:
+            content_hash: str = await asyncio.to_thread(_content_hash, doc["content"])
+            if ingested.get(doc["document_id"]) == content_hash:
+                log(f"Unchanged, skipping: {doc['metadata']['filename']}")
+                continue
+            pending[doc["document_id"]] = content_hash
+        await queue.put(doc)
     
-    client.tool_runtime.rag_tool.insert(
-        documents=documents,
-        vector_db_id=vector_db_id,
-        chunk_size_in_tokens=chunk_size_in_tokens,
-    )
-    print(f"Inserted {len(documents)} documents into vector DB")
+    await queue.put(None)
+
+
+async def _batch_documents(
+    queue: "asyncio.Queue[Optional[RAGDocument]]",
+    client: LlamaStackClient,
+    vector_db_id: str,
+    chunk_size_in_tokens: int,
+    batch_size: int,
+    max_concurrent_inserts: int,
+    ingested: Optional[dict[str, str]] = None,
+    pending: Optional[dict[str, str]] = None,
+    ready: Optional["asyncio.Future[Any]"] = None
+) -> int:
+    """Cut documents from the queue into batches as they arrive and insert them, with at most
+    max_concurrent_inserts batches in flight, until told to stop
+
+    When ready is given, it is awaited before the first insert. Returns the number of documents inserted.
+    """
+    inserted: int = 0
+    next_offset: int = 0
+    in_flight: set[asyncio.Task] = set()
+    
+    async def insert(batch: List[RAGDocument], offset: int) -> None:
+        nonlocal inserted
+        if ready is not None:
+            await ready
+        count: int = await asyncio.to_thread(
+            _insert_batches, client, batch, vector_db_id,
+            chunk_size_in_tokens, batch_size, DEFAULT_INSERT_MAX_BATCH_BYTES, offset
+        )
+        inserted += count
+        if ingested is not None and pending is not None:
+            for inserted_doc in batch:
+                if inserted_doc["document_id"] in pending:
+                    ingested[inserted_doc["document_id"]] = pending.pop(inserted_doc["document_id"])
+    
+    async def submit(batch: List[RAGDocument]) -> None:
+        nonlocal next_offset
+        # Wait for a free insert slot, surfacing any failure from the inserts that finished
+        while len(in_flight) >= max_concurrent_inserts:
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            in_flight.difference_update(done)
+            errors: List[BaseException] = [e for e in (task.exception() for task in done) if e is not None]
+            if errors:
+                raise errors[0]
+        in_flight.add(asyncio.create_task(insert(batch, next_offset)))
+        next_offset += len(batch)
+    
+    try:
+        batch: List[RAGDocument] = []
+        while True:
+            doc: Optional[RAGDocument] = await queue.get()
+            if doc is None:
+                break
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                await submit(batch)
+                batch = []
+        if batch:
+            await submit(batch)
+        await asyncio.gather(*in_flight)
+    except BaseException:
+        for task in in_flight:
+            task.cancel()
+        # Collect the other inserts' outcomes so their errors are not reported as never retrieved
+        await asyncio.gather(*in_flight, return_exceptions=True)
+        raise
+    return inserted
+
+
+async def ingest_documents(
+    client: LlamaStackClient,
+    folder_path: str,
+    vector_db_id: str,
+    chunk_size_in_tokens: int = 512,
+    file_extensions: Iterable[str] = ('.txt', '.md'),
+    batch_size: int = DEFAULT_INSERT_BATCH_SIZE,
+    max_concurrent_inserts: int = DEFAULT_MAX_CONCURRENT_INSERTS,
+    state_path: Optional[str] = None,
+    setup: Optional[Callable[[], Any]] = None
+) -> int:
+    """Load documents from a folder and insert them into the vector database, overlapping reads and inserts
+
+    When state_path is given, the content hash of every inserted document is recorded there
+    and documents that are unchanged since a previous run are not inserted again.
+    When setup is given, it runs in a worker thread while documents are being read
+    and must finish before the first insert (e.g. to register the vector DB).
+    Returns the number of documents inserted.
+    """
+    if max_concurrent_inserts < 1:
+        raise ValueError("Maximum concurrent inserts must be a positive integer")
+    
+    # Hashes are tracked per server and vector DB so a different target is always fully ingested
+    state: dict[str, dict[str, str]] = {}
+    ingested: Optional[dict[str, str]] = None
+    pending: dict[str, str] = {}
+    if state_path:
+        state = _load_ingested_state(state_path)
+        ingested = state.setdefault(f"{client.base_url}|{vector_db_id}", {})
+    
+    # Bounded so reading cannot run arbitrarily far ahead of the inserts
+    queue: asyncio.Queue[Optional[RAGDocument]] = asyncio.Queue(maxsize=batch_size * 2)
+    tasks: List[asyncio.Task] = []
+    ready: Optional[asyncio.Task] = None
+    if setup is not None:
+        ready = asyncio.create_task(asyncio.to_thread(setup))
+        tasks.append(ready)
+    tasks.append(asyncio.create_task(_produce_documents(queue, folder_path, file_extensions, ingested, pending)))
+    batcher: asyncio.Task = asyncio.create_task(_batch_documents(
+        queue, client, vector_db_id, chunk_size_in_tokens, batch_size, max_concurrent_inserts,
+        ingested, pending, ready
+    ))
+    tasks.append(batcher)
+    
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    finally:
+        # Saved on failure too, so a retry only re-inserts the batches that did not make it
+        if state_path:
+            _save_ingested_state(state_path, state)
+    
+    inserted: int = batcher.result()
+    if inserted == 0:
+        log("No documents to insert")
+    else:
+        log(f"Inserted {inserted} documents into vector DB")
+    return inserted
+
+
+def install_uvloop() -> bool:
+    """Use uvloop as the asyncio event loop if it is installed and supported, returning whether it was installed"""
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    uvloop.install()
+    log("Using uvloop event loop")
+    return True
 
 
 def main() -> None:
@@ -190,69 +724,46 @@ def main() -> None:
         if delay_seconds < 0:
             raise ValueError("Delay must be a positive integer")
     except (ValueError, TypeError) as e:
-        print(f"Warning: Invalid delay value '{args.delay}', defaulting to 0 seconds. Error: {e}")
+        log(f"Warning: Invalid delay value '{args.delay}', defaulting to 0 seconds. Error: {e}")
         delay_seconds = DEFAULT_DELAY_SECONDS
     
-    print(f"Delaying for {delay_seconds} seconds if task fails")
+    log(f"Delaying for {delay_seconds} seconds if task fails")
     
     try:
-        # Get embedding model id, dimension and provider
-        embedding_model_id = os.environ.get("EMBEDDING_MODEL")
-        if embedding_model_id is None:
-            raise ValueError("EMBEDDING_MODEL environment variable must be set")
-        embedding_model_dimension = os.environ.get("EMBEDDING_DIMENSION")
-        if embedding_model_dimension is None:
-            raise ValueError("EMBEDDING_DIMENSION environment variable must be set")
-        embedding_model_provider = os.environ.get("EMBEDDING_MODEL_PROVIDER")
-        if embedding_model_provider is None:
-            raise ValueError("EMBEDDING_MODEL_PROVIDER environment variable must be set")
-
-        # Get chunk size in tokens
-        chunk_size_in_tokens = os.environ.get("CHUNK_SIZE_IN_TOKENS", "512")
-        chunk_size_in_tokens = int(chunk_size_in_tokens)
-
-        # Get LlamaStack host, port and secure
-        host = os.environ.get("LLAMA_STACK_HOST")
-        if not host:
-            raise ValueError("LLAMA_STACK_HOST environment variable must be set")
-        port = os.environ.get("LLAMA_STACK_PORT")
-        if not port:
-            raise ValueError("LLAMA_STACK_PORT environment variable must be set")
-        secure = os.environ.get("LLAMA_STACK_SECURE", "false").lower() in ["true", "1", "yes"]
+        config: RunConfig = RunConfig.from_env()
         
-        # Add this after line ~195 where you read the environment variables
-        print(f"DEBUG - Environment variables:")
-        print(f"  HOST: '{host}'")
-        print(f"  PORT: '{port}' (type: {type(port)})")
-        print(f"  SECURE: '{secure}'")
-
-        # Get documents folder
-        docs_folder: str = os.environ.get("DOCS_FOLDER", "./docs")
-        if not docs_folder:
-            raise ValueError("DOCS_FOLDER environment variable must be set")
+        log(f"DEBUG - Environment variables:")
+        log(f"  HOST: '{config.host}'")
+        log(f"  PORT: '{config.port}' (type: {type(config.port)})")
+        log(f"  SECURE: '{config.secure}'")
 
         # Initialize client
-        client: LlamaStackClient = create_client(host=host, port=int(port), secure=secure)
-        print(f"Connected to LlamaStack at {host}:{port}")
+        client: LlamaStackClient = create_client(host=config.host, port=config.port, secure=config.secure)
+        log(f"Connected to LlamaStack at {config.host}:{config.port}")
         
-        # Register vector database
-        embedding_model = get_embedding_model(client, embedding_model_id, embedding_model_provider)
-        if not embedding_model:
-            raise ValueError(f"Embedding model {embedding_model_id} not found for provider {embedding_model_provider}")
-        print(f"Using embedding model: {embedding_model.identifier} (dimension: {embedding_model.metadata['embedding_dimension']})")
-        vector_db_id: str = register_vector_db(client, embedding_model)
+        # Register vector database, done while the documents are being read
+        vector_db_id: str = "milvus_db"
         
-        # Load documents from folder
-        documents: List[RAGDocument] = load_documents_from_folder(docs_folder)
+        def setup_vector_db() -> None:
+            embedding_model = get_embedding_model(client, config.embedding_model_id, config.embedding_model_provider)
+            if not embedding_model:
+                raise ValueError(f"Embedding model {config.embedding_model_id} not found for provider {config.embedding_model_provider}")
+            log(f"Using embedding model: {embedding_model.identifier} (dimension: {embedding_model.metadata['embedding_dimension']})")
+            register_vector_db(client, embedding_model, vector_db_id=vector_db_id)
         
-        # Insert documents into the vector database
-        insert_documents(client, documents, vector_db_id, chunk_size_in_tokens=512)
+        # Load documents from folder and insert them into the vector database
+        install_uvloop()
+        inserted: int = asyncio.run(ingest_documents(
+            client, config.docs_folder, vector_db_id, chunk_size_in_tokens=config.chunk_size_in_tokens,
+            state_path=config.ingested_state_file or None,
+            setup=setup_vector_db
+        ))
         
-        print(f"Documents inserted into the vector database {vector_db_id} with chunk size in tokens {chunk_size_in_tokens}")
+        log(f"{inserted} documents inserted into the vector database {vector_db_id} with chunk size in tokens {config.chunk_size_in_tokens}")
     except Exception as e:
-        print(f"Error: {e}")
+        log(f"Error: {e}")
         if delay_seconds > 0:
-            print(f"Delaying for {delay_seconds} seconds before raising error")
+            log(f"Delaying for {delay_seconds} seconds before raising error")
             time.sleep(delay_seconds)
         raise e
 